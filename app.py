@@ -1,8 +1,21 @@
-from flask import Flask, render_template, request, send_file, redirect, url_for
+from flask import Flask, render_template, request, send_file, redirect, url_for, jsonify
 import pandas as pd
+import pyarrow as pa
 import os
+import io
 import time
-from serpapi import GoogleSearch
+import random
+import json
+import hashlib
+import sqlite3
+import threading
+import queue
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import orjson
 from dotenv import load_dotenv
 
 load_dotenv()  # <-- load .env file
@@ -12,6 +25,9 @@ SERPAPI_KEY = os.environ.get("SERPAPI_KEY")
 if not SERPAPI_KEY:
     raise RuntimeError("SERPAPI_KEY environment variable not set! Please set it before running the app.")
 
+SERPAPI_URL = "https://serpapi.com/search.json"
+SERPAPI_TIMEOUT = 30   # seconds
+
 app = Flask(__name__)
 
 
@@ -19,39 +35,346 @@ app = Flask(__name__)
 # 🔐 Simple admin password (change it as you like)
 ADMIN_PASSWORD = "pratik123"
 
-# 📂 Excel file paths
+# 📂 Data file paths (xlsx is only used for import/export)
 DATA_PATH = os.path.join("data", "faculty_data.xlsx")
+PARQUET_PATH = os.path.join("data", "faculty_data.parquet")
 UPDATED_PATH = os.path.join("data", "faculty_data_updated.xlsx")
 
-# ⏱️ Delay between SerpAPI calls (to be nice to the API)
-SLEEP_BETWEEN_CALLS = 1.0   # seconds
+# 🔢 Scholar metric columns (numeric only; Parquet rejects stray text like "-")
+METRIC_COLUMNS = ["Citations", "h-index", "i10-index"]
+
+# 🗃️ On-disk cache of SerpAPI results (Scholar metrics change slowly)
+CACHE_DB = os.path.join("data", "serp_cache.db")
+CACHE_TTL = 48 * 3600   # seconds
+
+# ⏱️ Upper bound for the exponential backoff between SerpAPI retries
+MAX_BACKOFF = 30   # seconds
+
+# 🚦 Parallel SerpAPI calls for bulk update + global request budget
+MAX_WORKERS = 8
+MAX_CALLS_PER_SECOND = 10
+
+_rate_lock = threading.Lock()
+_next_call_at = 0.0
+
+# 🧵 Background "update all" jobs: job_id -> progress + result
+JOBS = {}
+MAX_JOBS_KEPT = 10
+_jobs_lock = threading.Lock()
+
+# 🗃️ Shared SQLite connection for the result cache (opened on first use)
+_cache_lock = threading.Lock()
+_cache_conn = None
+
+# 🌐 One pooled HTTP session for all SerpAPI calls (reuses TLS connections)
+_session = requests.Session()
+_session.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=32,
+        # 429 is left to wait_for_rate_limit() + backoff() in fetch_scholar_data
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=(500, 502, 503, 504),
+        ),
+    ),
+)
+
+# 🧠 Parsed faculty sheet, reused until the file on disk changes
+_df_lock = threading.Lock()
+_df_cache = {
+    "source": None,
+    "mtime": 0,
+    "df": None,
+    "name_index": {},
+    "names": [],
+    "save_error": None,   # set while the in-memory data is not on disk
+}
+
+# 💾 Deferred saves, written by one background thread
+_save_queue = queue.Queue()
+_writer_started = False
 
 
 # -------------------------------------------------
-# Helper functions for Excel
+# Helper functions for faculty data (Parquet + Excel)
 # -------------------------------------------------
-def load_faculty_df():
-    """Load the Excel file into a DataFrame."""
-    if not os.path.exists(DATA_PATH):
+def _current_data_file():
+    """Parquet holds the working data, unless the xlsx was edited after it."""
+    if os.path.exists(PARQUET_PATH) and (
+        not os.path.exists(DATA_PATH)
+        or os.path.getmtime(PARQUET_PATH) >= os.path.getmtime(DATA_PATH)
+    ):
+        return PARQUET_PATH
+    return DATA_PATH
+
+
+def write_atomic(path, write):
+    """
+    Call write(tmp_path), then move the temp file over path in one step.
+
+    A crash mid-write never leaves a truncated file behind, and readers see
+    either the old or the new file (so the mtime cache can trust it).
+    """
+    # Keep the real extension: pandas picks/validates the Excel engine by it
+    root, ext = os.path.splitext(path)
+    tmp = f"{root}.{threading.get_ident()}.tmp{ext}"
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def write_parquet(df):
+    """Write the working faculty data file (atomically)."""
+    write_atomic(PARQUET_PATH, lambda tmp: df.to_parquet(tmp, engine="pyarrow", index=False))
+
+
+def read_excel_fast(path):
+    """Read an xlsx with the (much faster) calamine engine, else openpyxl."""
+    try:
+        return pd.read_excel(path, engine="calamine")
+    except ImportError:
+        return pd.read_excel(path)
+
+
+def _build_name_index(lower_names):
+    """Map lowercase faculty name -> list of row positions."""
+    name_index = {}
+    for i, name in enumerate(lower_names.tolist()):
+        if not pd.isna(name):
+            name_index.setdefault(name, []).append(i)
+    return name_index
+
+
+def _set_cached_df(df, **file_info):
+    """Replace the cached DataFrame and everything derived from it."""
+    # Convert + lowercase the name column once, with Arrow string kernels
+    names_col = df["Name of Faculty"].astype("string[pyarrow]")
+    lower_names = names_col.str.lower()
+    names = sorted(set(names_col.dropna().tolist()), key=lambda n: (n.lower(), n))
+    _df_cache.update(df=df, name_index=_build_name_index(lower_names), names=names, **file_info)
+
+
+def _refresh_cache():
+    """Re-read the data file if it changed on disk (caller holds _df_lock)."""
+    source = _current_data_file()
+    if not os.path.exists(source):
         raise FileNotFoundError(f"Excel file not found at {DATA_PATH}")
-    return pd.read_excel(DATA_PATH)
 
+    mtime = os.path.getmtime(source)
+    if (source, mtime) != (_df_cache["source"], _df_cache["mtime"]):
+        if source == PARQUET_PATH:
+            df = pd.read_parquet(PARQUET_PATH)
+        else:
+            # Import the xlsx once, then keep working from Parquet
+            df = read_excel_fast(DATA_PATH)
+            for col in METRIC_COLUMNS:
+                if col in df.columns:
+                    df[col] = pd.to_numeric(df[col], errors="coerce")
+            try:
+                write_parquet(df)
+                source, mtime = PARQUET_PATH, os.path.getmtime(PARQUET_PATH)
+            except Exception as e:
+                print(f"⚠️ Could not convert Excel to Parquet: {e}")
+        _set_cached_df(df, source=source, mtime=mtime, save_error=None)
+
+
+def load_faculty_df():
+    """Load faculty data into a DataFrame (re-read only when the file changes)."""
+    with _df_lock:
+        _refresh_cache()
+        # Callers modify their DataFrame, so never hand out the cached one
+        return _df_cache["df"].copy()
+
+
+def load_faculty_with_index():
+    """Like load_faculty_df(), plus the lowercase-name index for lookups."""
+    with _df_lock:
+        _refresh_cache()
+        return _df_cache["df"].copy(), _df_cache["name_index"]
+
+
+def load_faculty_names():
+    """Unique faculty names sorted case-insensitively (for the dropdowns)."""
+    with _df_lock:
+        _refresh_cache()
+        return _df_cache["names"]
+
+
+def save_faculty_df(df):
+    """Save the working faculty data (Parquet) right away."""
+    with _df_lock:
+        write_parquet(df)
+        _set_cached_df(
+            df, source=PARQUET_PATH, mtime=os.path.getmtime(PARQUET_PATH), save_error=None
+        )
+
+
+def save_faculty_df_later(df):
+    """
+    Make df the current faculty data now, but write it to disk in the background.
+
+    Readers get the new data from memory straight away; the file on disk
+    catches up a moment later. If that write fails, the data stays in memory
+    (and is written by the next save) and load_save_error() reports it.
+    """
+    global _writer_started
+    with _df_lock:
+        _set_cached_df(df)
+        if not _writer_started:
+            threading.Thread(target=_background_writer, daemon=True).start()
+            _writer_started = True
+    _save_queue.put(df)
+
+
+def _background_writer():
+    """Write queued DataFrames; stale ones (already superseded) are skipped."""
+    while True:
+        df = _save_queue.get()
+        with _df_lock:
+            if _df_cache["df"] is not df:
+                continue
+            try:
+                write_parquet(df)
+                _df_cache.update(
+                    source=PARQUET_PATH, mtime=os.path.getmtime(PARQUET_PATH), save_error=None
+                )
+            except Exception as e:
+                print(f"⚠️ Background save failed: {e}")
+                _df_cache["save_error"] = str(e)
+
+
+def load_save_error():
+    """Why the latest changes are not on disk yet (None if everything is saved)."""
+    with _df_lock:
+        return _df_cache["save_error"]
+
+
+def export_faculty_xlsx(df, path=UPDATED_PATH):
+    """Write the DataFrame as an Excel file (for downloads).
+
+    xlsxwriter streams plain values and is much lighter than openpyxl's
+    default in-memory workbook.
+    """
+    df.to_excel(path, index=False, engine="xlsxwriter")
+
+
+# -------------------------------------------------
+# SerpAPI: global rate limiter (shared by all threads)
+# -------------------------------------------------
+def wait_for_rate_limit():
+    """Block until the next SerpAPI call fits into MAX_CALLS_PER_SECOND."""
+    global _next_call_at
+    with _rate_lock:
+        now = time.monotonic()
+        wait = _next_call_at - now
+        _next_call_at = max(now, _next_call_at) + 1.0 / MAX_CALLS_PER_SECOND
+    if wait > 0:
+        time.sleep(wait)
+
+
+def backoff(attempt):
+    """Sleep 2^attempt seconds (+ jitter, capped) before retrying a failed call."""
+    time.sleep(min(MAX_BACKOFF, 2 ** attempt + random.random()))
 
-def save_faculty_df(df, path=DATA_PATH):
-    """Save the DataFrame back to Excel."""
-    df.to_excel(path, index=False)
+
+def serpapi_search(params):
+    """Call the SerpAPI JSON endpoint directly and return the parsed response."""
+    wait_for_rate_limit()
+    resp = _session.get(SERPAPI_URL, params=params, timeout=SERPAPI_TIMEOUT)
+    resp.raise_for_status()
+    return orjson.loads(resp.content)
+
+
+# -------------------------------------------------
+# SerpAPI result cache (single SQLite file in WAL mode)
+# -------------------------------------------------
+def _cache_db():
+    """Open the cache database once (caller holds _cache_lock)."""
+    global _cache_conn
+    if _cache_conn is None:
+        conn = sqlite3.connect(CACHE_DB, check_same_thread=False)
+        conn.executescript(
+            "PRAGMA journal_mode=WAL;"
+            "PRAGMA synchronous=NORMAL;"
+            "CREATE TABLE IF NOT EXISTS cache("
+            "key TEXT PRIMARY KEY, ts INTEGER, payload BLOB);"
+        )
+        _cache_conn = conn
+    return _cache_conn
+
+
+def cache_key(user_id):
+    """Cache key for one Scholar author id."""
+    return hashlib.sha256(user_id.encode()).hexdigest()
+
+
+def load_cached_result(user_id, max_age=CACHE_TTL):
+    """Return the cached result if it is younger than max_age (None = any age)."""
+    min_ts = 0 if max_age is None else time.time() - max_age
+    try:
+        with _cache_lock:
+            row = _cache_db().execute(
+                "SELECT payload FROM cache WHERE key=? AND ts>?",
+                (cache_key(user_id), min_ts),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+    except (sqlite3.Error, ValueError) as e:
+        print(f"⚠️ Could not read cache for {user_id}: {e}")
+        return None
+
+
+def save_cached_result(user_id, data):
+    """Store a successful result in the cache (errors are only logged)."""
+    try:
+        with _cache_lock:
+            conn = _cache_db()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache(key, ts, payload) VALUES (?, ?, ?)",
+                    (cache_key(user_id), int(time.time()), json.dumps(data)),
+                )
+    except sqlite3.Error as e:
+        print(f"⚠️ Could not write cache for {user_id}: {e}")
 
 
 # -------------------------------------------------
 # SerpAPI: Fetch data for ONE Google Scholar profile
 # -------------------------------------------------
+# cited_by.table[i] holds {key: {"all": ..., "since_20xx": ...}}
+SCHOLAR_FIELDS = [
+    ("citations", "Citations"),
+    ("h_index", "H-index"),
+    ("i10_index", "i10-index"),
+]
+
+
+def extract_metrics(results):
+    """Pull name + metrics out of a SerpAPI author response (missing -> 0)."""
+    table = results.get("cited_by", {}).get("table", [])
+    data = {"Name": results.get("author", {}).get("name", "Unknown")}
+
+    for i, (key, label) in enumerate(SCHOLAR_FIELDS):
+        d = (table[i].get(key) or {}) if i < len(table) else {}
+        data[label] = int(d.get("all") or d.get("since_2020") or d.get("since_2019") or 0)
+
+    return data
+
+
 def fetch_scholar_data(profile_url, retries=2):
     """
     Fetch citations, h-index, i10-index for one Google Scholar profile via SerpAPI.
 
     Returns:
         dict  -> { "Name", "Citations", "H-index", "i10-index" }
-        None  -> if completely failed
+                 (+ "stale": True if SerpAPI failed and cached data was used)
+        None  -> if completely failed and nothing is cached
     """
     try:
         if "user=" not in profile_url:
@@ -61,6 +384,11 @@ def fetch_scholar_data(profile_url, retries=2):
         # Extract author_id (user parameter)
         user_id = profile_url.split("user=")[1].split("&")[0]
 
+        cached = load_cached_result(user_id)
+        if cached:
+            print(f"🗃️ Cache hit for {profile_url}")
+            return cached
+
         params = {
             "engine": "google_scholar_author",
             "author_id": user_id,
@@ -70,76 +398,34 @@ def fetch_scholar_data(profile_url, retries=2):
 
         for attempt in range(retries):
             try:
-                search = GoogleSearch(params)
-                results = search.get_dict()
-
-                author = results.get("author", {})
-                cited_by = results.get("cited_by", {})
-                table = cited_by.get("table", [])
-
-                # Default values
-                citations_all = 0
-                h_index_all = 0
-                i10_index_all = 0
-
-                # ---- table[0] : citations ----
-                if len(table) >= 1:
-                    cit_dict = table[0].get("citations", {}) or {}
-                    citations_all = (
-                        cit_dict.get("all")
-                        or cit_dict.get("since_2020")
-                        or cit_dict.get("since_2019")
-                        or 0
-                    )
-
-                # ---- table[1] : h_index ----
-                if len(table) >= 2:
-                    h_dict = table[1].get("h_index", {}) or {}
-                    h_index_all = (
-                        h_dict.get("all")
-                        or h_dict.get("since_2020")
-                        or h_dict.get("since_2019")
-                        or 0
-                    )
-
-                # ---- table[2] : i10_index ----
-                if len(table) >= 3:
-                    i_dict = table[2].get("i10_index", {}) or {}
-                    i10_index_all = (
-                        i_dict.get("all")
-                        or i_dict.get("since_2020")
-                        or i_dict.get("since_2019")
-                        or 0
-                    )
-
-                name = author.get("name", "Unknown")
+                data = extract_metrics(serpapi_search(params))
 
                 # If everything looks empty, retry
-                if name == "Unknown" and citations_all == 0 and h_index_all == 0:
+                if data["Name"] == "Unknown" and data["Citations"] == 0 and data["H-index"] == 0:
                     print(f"⚠️ Empty data on attempt {attempt+1} for {profile_url}, retrying...")
-                    time.sleep(SLEEP_BETWEEN_CALLS)
+                    if attempt < retries - 1:
+                        backoff(attempt)
                     continue
 
-                # Make sure they are ints (and not None)
-                citations_all = int(citations_all or 0)
-                h_index_all = int(h_index_all or 0)
-                i10_index_all = int(i10_index_all or 0)
-
                 print(
-                    f"✅ {name} → Cites: {citations_all}, "
-                    f"h-index: {h_index_all}, i10-index: {i10_index_all}"
+                    f"✅ {data['Name']} → Cites: {data['Citations']}, "
+                    f"h-index: {data['H-index']}, i10-index: {data['i10-index']}"
                 )
 
-                return {
-                    "Name": name,
-                    "Citations": citations_all,
-                    "H-index": h_index_all,
-                    "i10-index": i10_index_all,
-                }
+                save_cached_result(user_id, data)
+                return data
 
             except Exception as e:
                 print(f"⚠️ Error attempt {attempt+1} for {profile_url}: {e}")
-                time.sleep(SLEEP_BETWEEN_CALLS)
+                if attempt < retries - 1:
+                    backoff(attempt)
+
+        # Serve the last known good values rather than losing them
+        stale = load_cached_result(user_id, max_age=None)
+        if stale:
+            print(f"⚠️ Failed to fetch {profile_url}, serving stale cached data")
+            stale["stale"] = True
+            return stale
 
         print(f"❌ Failed to fetch data for {profile_url}")
         return None
@@ -156,20 +442,14 @@ def fetch_scholar_data(profile_url, retries=2):
 def home():
     """Home page: load all faculty names for the dropdowns."""
     try:
-        df = load_faculty_df()
-        faculty_names = (
-            df["Name of Faculty"]
-            .dropna()
-            .astype(str)
-            .drop_duplicates()
-            .sort_values(key=lambda s: s.str.lower())
-            .tolist()
-        )
+        faculty_names = load_faculty_names()
     except Exception as e:
         print("Error loading faculty names:", e)
         faculty_names = []
 
-    return render_template("index.html", faculty_names=faculty_names)
+    return render_template(
+        "index.html", faculty_names=faculty_names, save_error=load_save_error()
+    )
 
 
 # ---------- View one faculty ----------
@@ -182,20 +462,19 @@ def fetch_one():
         return render_template("result_one.html", error="Please select a faculty name.")
 
     try:
-        df = load_faculty_df()
+        df, name_index = load_faculty_with_index()
     except Exception as e:
         return render_template("result_one.html", error=str(e))
 
-    mask = df["Name of Faculty"].astype(str).str.lower() == faculty_name.lower()
-    matches = df[mask]
+    rows = df.index[name_index.get(faculty_name.lower(), [])]
 
-    if matches.empty:
+    if rows.empty:
         return render_template(
             "result_one.html",
             error=f"No faculty found with name '{faculty_name}'."
         )
 
-    row = matches.iloc[0]
+    row = df.loc[rows[0]]
     url = str(row["Google Scholar Profile URL"]).strip()
 
     data = fetch_scholar_data(url)
@@ -203,13 +482,10 @@ def fetch_one():
         return render_template("result_one.html", error="Failed to fetch data from Google Scholar.")
 
     # Update row in Excel
-    df.loc[mask, "Citations"] = data["Citations"]
-    df.loc[mask, "h-index"] = data["H-index"]
-    df.loc[mask, "i10-index"] = data["i10-index"]
-    try:
-        save_faculty_df(df)
-    except PermissionError:
-        print("⚠️ Could not save Excel (maybe open in Excel). Skipping save.")
+    df.loc[rows, "Citations"] = data["Citations"]
+    df.loc[rows, "h-index"] = data["H-index"]
+    df.loc[rows, "i10-index"] = data["i10-index"]
+    save_faculty_df_later(df)
 
     return render_template("result_one.html", data=data, faculty_name=faculty_name, url=url)
 
@@ -244,12 +520,18 @@ def add_faculty():
         "h-index": None,
         "i10-index": None,
     }
-    df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
+    # Append in place (index is always 0..n-1) instead of concat-copying everything
+    df.loc[len(df), list(new_row.keys())] = list(new_row.values())
+    # Enlarging via .loc upcasts ints to float; keep serial numbers integer
+    # (unless the column has blanks, e.g. it was missing from the sheet)
+    if pd.api.types.is_float_dtype(df["Sr.No"]) and df["Sr.No"].notna().all():
+        df["Sr.No"] = df["Sr.No"].astype("int64")
 
     try:
         save_faculty_df(df)
-    except PermissionError:
-        print("⚠️ Could not save Excel (maybe open in Excel). Skipping save.")
+    except (OSError, pa.ArrowException) as e:
+        print(f"⚠️ Could not save faculty data when adding: {e}")
+        return render_template("result_one.html", error=f"Could not save faculty data: {e}")
 
     msg = f"Faculty '{faculty_name}' added successfully."
     return render_template("result_one.html", message=msg)
@@ -269,76 +551,176 @@ def delete_faculty():
         return render_template("result_one.html", error="Please select a faculty to delete.")
 
     try:
-        df = load_faculty_df()
+        df, name_index = load_faculty_with_index()
     except Exception as e:
         return render_template("result_one.html", error=str(e))
 
-    mask_keep = df["Name of Faculty"].astype(str).str.lower() != faculty_name.lower()
-    new_df = df[mask_keep].copy()
+    positions = name_index.get(faculty_name.lower())
 
-    if len(new_df) == len(df):
+    if not positions:
         return render_template("result_one.html", error=f"No faculty found with name '{faculty_name}'.")
 
+    new_df = df.drop(df.index[positions]).reset_index(drop=True)
+
     # Re-number Sr.No
     if "Sr.No" in new_df.columns:
         new_df["Sr.No"] = range(1, len(new_df) + 1)
 
     try:
         save_faculty_df(new_df)
-    except PermissionError:
-        print("⚠️ Could not save Excel when deleting (maybe open).")
+    except (OSError, pa.ArrowException) as e:
+        print(f"⚠️ Could not save faculty data when deleting: {e}")
+        return render_template("result_one.html", error=f"Could not save faculty data: {e}")
 
     msg = f"Faculty '{faculty_name}' deleted successfully."
     return render_template("result_one.html", message=msg)
 
 
 # ---------- Update Excel for ALL faculty ----------
+def run_update(job_id, df):
+    """Background job: fetch fresh metrics for all faculty and write updated Excel."""
+    job = JOBS[job_id]
+    rows = []
+    failed_idx = []
+    stale_idx = []
+    work = []
+
+    try:
+        for idx, row in df.iterrows():
+            url = str(row["Google Scholar Profile URL"]).strip()
+
+            if not url or not url.startswith("http"):
+                failed_idx.append(idx)
+                continue
+
+            work.append((idx, url))
+
+        with _jobs_lock:
+            job["done"] = job["failed"] = len(failed_idx)
+
+        # Fetch all profiles in parallel; pandas writes stay on this thread
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+            futures = {ex.submit(fetch_scholar_data, url): idx for idx, url in work}
+
+            for future in as_completed(futures):
+                idx = futures[future]
+                data = future.result()
+                if data:
+                    rows.append({
+                        "idx": idx,
+                        "Citations": data["Citations"],
+                        "h-index": data["H-index"],
+                        "i10-index": data["i10-index"],
+                    })
+                    if data.get("stale"):
+                        stale_idx.append(idx)
+                else:
+                    failed_idx.append(idx)
+
+                with _jobs_lock:
+                    job["done"] += 1
+                    job["failed"] = len(failed_idx)
+
+        # Apply all results in one go; nullable Int64 keeps the metrics integers
+        if rows:
+            patch = pd.DataFrame(rows).set_index("idx").astype("Int64")
+            for col in patch.columns:
+                df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
+            df.update(patch)
+
+        # Save updated Excel
+        try:
+            write_atomic(UPDATED_PATH, lambda tmp: export_faculty_xlsx(df, tmp))
+        except PermissionError:
+            print("⚠️ Could not save UPDATED Excel (maybe open).")
+
+        with _jobs_lock:
+            job.update(
+                status="finished",
+                updated=len(rows),
+                failed_list=[str(df.at[idx, "Name of Faculty"]) for idx in sorted(failed_idx)],
+                stale_list=[str(df.at[idx, "Name of Faculty"]) for idx in sorted(stale_idx)],
+            )
+    except Exception as e:
+        print(f"❌ Update job {job_id} failed: {e}")
+        with _jobs_lock:
+            job.update(status="error", error=str(e))
+
+
 @app.route("/update_excel", methods=["POST"])
 def update_excel():
-    """Fetch fresh metrics for all faculty and write updated Excel."""
+    """Start the "update all" job in the background and show its progress page."""
     try:
         df = load_faculty_df()
     except Exception as e:
         return render_template("result_all.html", error=str(e))
 
-    updated_count = 0
-    failed_list = []
-
-    for idx, row in df.iterrows():
-        name = str(row["Name of Faculty"])
-        url = str(row["Google Scholar Profile URL"]).strip()
+    with _jobs_lock:
+        # Only one bulk update at a time: re-attach to a running one
+        for job_id, job in JOBS.items():
+            if job["status"] == "running":
+                return redirect(url_for("update_status", job_id=job_id))
+
+        # Forget old finished jobs
+        for old_id in list(JOBS)[:-MAX_JOBS_KEPT]:
+            del JOBS[old_id]
+
+        job_id = uuid.uuid4().hex
+        JOBS[job_id] = {
+            "status": "running",
+            "done": 0,
+            "total": len(df),
+            "failed": 0,
+            "updated": 0,
+            "failed_list": [],
+            "stale_list": [],
+            "error": None,
+        }
 
-        if not url or not url.startswith("http"):
-            failed_list.append(name)
-            continue
+    threading.Thread(target=run_update, args=(job_id, df), daemon=True).start()
+    return redirect(url_for("update_status", job_id=job_id))
 
-        print(f"🔄 Updating: {name}")
-        data = fetch_scholar_data(url)
-        if data:
-            df.at[idx, "Citations"] = data["Citations"]
-            df.at[idx, "h-index"] = data["H-index"]
-            df.at[idx, "i10-index"] = data["i10-index"]
-            updated_count += 1
-        else:
-            failed_list.append(name)
 
-        time.sleep(SLEEP_BETWEEN_CALLS)  # respect API rate limits
+@app.route("/update_status/<job_id>")
+def update_status(job_id):
+    """Progress page of an update job; shows the summary once it has finished."""
+    with _jobs_lock:
+        job = dict(JOBS.get(job_id) or {})
 
-    # Save updated Excel
-    try:
-        save_faculty_df(df, UPDATED_PATH)
-    except PermissionError:
-        print("⚠️ Could not save UPDATED Excel (maybe open).")
+    if not job:
+        return render_template("result_all.html", error="Unknown or expired update job.")
+    if job["status"] == "error":
+        return render_template("result_all.html", error=f"Update failed: {job['error']}")
 
     return render_template(
         "result_all.html",
-        updated=updated_count,
-        total=len(df),
-        failed_list=failed_list,
+        job_id=job_id,
+        running=job["status"] == "running",
+        done=job["done"],
+        failed=job["failed"],
+        updated=job["updated"],
+        total=job["total"],
+        failed_list=job["failed_list"],
+        stale_list=job["stale_list"],
         download_ready=os.path.exists(UPDATED_PATH)
     )
 
 
+@app.route("/progress/<job_id>")
+def progress(job_id):
+    """JSON progress of an update job (polled by the progress page)."""
+    with _jobs_lock:
+        job = JOBS.get(job_id)
+        if not job:
+            return jsonify(error="Unknown job"), 404
+        return jsonify(
+            status=job["status"],
+            done=job["done"],
+            total=job["total"],
+            failed=job["failed"],
+        )
+
+
 @app.route("/download_updated")
 def download_updated():
     """Download the updated Excel file."""
@@ -348,5 +730,19 @@ def download_updated():
     return send_file(UPDATED_PATH, as_attachment=True)
 
 
+@app.route("/export_xlsx")
+def export_xlsx():
+    """Download the current faculty data as Excel (built on demand)."""
+    try:
+        df = load_faculty_df()
+    except Exception as e:
+        return str(e), 404
+
+    buf = io.BytesIO()
+    export_faculty_xlsx(df, buf)
+    buf.seek(0)
+    return send_file(buf, as_attachment=True, download_name="faculty_data.xlsx")
+
+
 if __name__ == "__main__":
     app.run(debug=True)